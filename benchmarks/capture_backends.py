@@ -0,0 +1,71 @@
+# Grabs per second of each capture backend on the real screens of the
+# current session: Qt's QScreen.grabWindow, X11 shared memory (MIT-SHM) and
+# its plain XGetImage fallback. The X11 backends only run under an X11
+# session (QT_QPA_PLATFORM=xcb); offscreen has nothing to grab.
+#
+#   python benchmarks/capture_backends.py [--grabs 100] [--rect 0,0,800,600]
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PyQt5 import QtCore, QtGui, QtWidgets
+import sstaker
+
+
+def backends():
+    yield "qt", sstaker.QtCaptureBackend()
+    if QtGui.QGuiApplication.platformName() != "xcb":
+        return
+    try:
+        shm = sstaker.XShmCaptureBackend()
+    except OSError as e:
+        print(f"xshm unavailable: {e}")
+        return
+    if shm.xext is not None:
+        yield "xshm", shm
+    # Same backend with the extension switched off, as on a remote display
+    plain = sstaker.XShmCaptureBackend()
+    if plain.xext is not None:
+        plain.free_images()
+        plain.xext = None
+        plain.name = "xgetimage"
+    yield "xgetimage", plain
+
+
+def main():
+    parser = argparse.ArgumentParser(description="grabs per second of each capture backend")
+    parser.add_argument("--grabs", type=int, default=100)
+    parser.add_argument("--rect", help="x,y,w,h within the primary screen (default: the whole screen)")
+    args = parser.parse_args()
+    app = QtWidgets.QApplication(sys.argv[:1])
+    screen = app.primaryScreen()
+    rect = QtCore.QRect(*(int(v) for v in args.rect.split(","))) if args.rect else None
+    probe = sstaker.QtCaptureBackend().grab(screen, rect)
+    if probe.isNull():
+        raise SystemExit(f"nothing to grab on the {app.platformName()} platform; run in a desktop session")
+    size = probe.size()
+    mb = size.width() * size.height() * 4 / (1024 * 1024)
+    print(f"{app.platformName()}, {size.width()}x{size.height()} device pixels per grab, {args.grabs} grabs")
+    for name, backend in backends():
+        backend.grab(screen, rect)  # Warm up: shared-memory segment, first connection
+        if backend.name != name:
+            print(f"{name:10s} fell back to {backend.name}")
+            backend.close()
+            continue
+        times = []
+        for _ in range(args.grabs):
+            start = time.perf_counter()
+            backend.grab(screen, rect)
+            times.append(time.perf_counter() - start)
+        total = sum(times)
+        print(f"{name:10s} {args.grabs / total:7.1f} grabs/s  p50 {statistics.median(times) * 1000:6.2f} ms  "
+              f"{mb * args.grabs / total:8.1f} MB/s")
+        if hasattr(backend, "close"):
+            backend.close()
+
+
+if __name__ == "__main__":
+    main()
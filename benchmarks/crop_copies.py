@@ -0,0 +1,94 @@
+# Bytes copied, Python allocations and time to get from a screen grab to a
+# PIL image ready to encode, for the original path (QPixmap crop, toImage,
+# convertToFormat, asstring, frombytes) against ScreenGrab.copy_image and
+# qimage_to_pil. Qt buffers are told apart by their data pointers, so a
+# shallow copy is not counted; Python-side allocations come from tracemalloc.
+#
+#   python benchmarks/crop_copies.py [--layout 1080p] [--repeat 20]
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import fake_screens
+from fake_screens import sstaker
+from PIL import Image
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Copies:
+    def __init__(self, source):
+        self.seen = {int(source.constBits())}
+        self.bytes = 0
+
+    def image(self, img):
+        # A QImage whose pixels are not a buffer seen before is a copy
+        ptr = int(img.constBits())
+        if ptr not in self.seen:
+            self.seen.add(ptr)
+            self.bytes += img.byteCount()
+        return img
+
+    def pil(self, pil_img):
+        # frombuffer wraps memory read-only; anything else owns its pixels
+        if not pil_img.readonly:
+            self.bytes += pil_img.width * pil_img.height * 4
+        return pil_img
+
+
+def original(grab, rect, copies):
+    geo, pixmap = grab.tiles[0]
+    crop = pixmap.copy(grab.source(rect, geo, pixmap).toRect())
+    img = copies.image(crop.toImage())
+    img = copies.image(img.convertToFormat(QtGui.QImage.Format_ARGB32))
+    buffer = img.bits().asstring(img.byteCount())
+    copies.bytes += len(buffer)
+    return copies.pil(Image.frombytes("RGBA", (img.width(), img.height()), buffer, "raw", "BGRA")), img
+
+
+def current(grab, rect, copies):
+    img = copies.image(grab.copy_image(rect))
+    pil_img = sstaker.qimage_to_pil(img)
+    copies.image(img)  # convertTo may have swapped the buffer
+    return copies.pil(pil_img), img
+
+
+def measure(path, grab, rect, repeat):
+    source = grab.tiles[0][1].toImage()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        path(grab, rect, Copies(source))
+        times.append((time.perf_counter() - start) * 1000)
+    copies = Copies(source)
+    tracemalloc.start()
+    result = path(grab, rect, copies)
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return statistics.median(times), copies.bytes, python_peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="copies on the crop-to-encoder path")
+    parser.add_argument("--layout", choices=list(fake_screens.LAYOUTS), default="1080p")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    app = QtWidgets.QApplication([])
+    fake_screens.install(args.layout)
+    grab, _, _ = sstaker.Overlay.grab_fullscreen()
+    screen = grab.tiles[0][0]
+    selections = {"full screen": screen,
+                  "800x600": QtCore.QRect(screen.topLeft() + QtCore.QPoint(100, 100), QtCore.QSize(800, 600))}
+    mb = 1024 * 1024
+    for label, rect in selections.items():
+        crop_bytes = grab.copy_image(rect).byteCount()
+        print(f"{label} ({crop_bytes / mb:.1f} MB of pixels)")
+        for name, path in (("original", original), ("copy_image", current)):
+            ms, copied, python_peak = measure(path, grab, rect, args.repeat)
+            print(f"  {name:10s} {ms:6.2f} ms   copied {copied / mb:6.1f} MB ({copied / crop_bytes:.1f}x)   "
+                  f"Python peak {python_peak / mb:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
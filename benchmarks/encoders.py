@@ -0,0 +1,106 @@
+# Encode ms, decode ms and bytes for every encoder in sstaker.ENCODERS on a
+# fixed corpus of synthetic screenshot-like images (text, flat UI, photo),
+# so the default encoder can be chosen from data.
+#
+#   python benchmarks/encoders.py [--size 1920x1080] [--repeat 5]
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtGui
+import sstaker
+
+
+def text_image(w, h):
+    img = QtGui.QImage(w, h, QtGui.QImage.Format_RGB32)
+    img.fill(QtGui.QColor("white"))
+    p = QtGui.QPainter(img)
+    p.setRenderHint(QtGui.QPainter.TextAntialiasing)
+    p.setPen(QtGui.QColor(30, 30, 30))
+    line = "2026-10-17 14:03:22 INFO worker[3] processed batch 8812 in 41.7 ms (queue depth 12)"
+    for i, y in enumerate(range(16, h, 18)):
+        p.drawText(8, y, f"{i:05d} {line}")
+    p.end()
+    return img
+
+
+def ui_image(w, h):
+    img = QtGui.QImage(w, h, QtGui.QImage.Format_RGB32)
+    img.fill(QtGui.QColor("#f3f3f3"))
+    p = QtGui.QPainter(img)
+    p.setRenderHint(QtGui.QPainter.Antialiasing)
+    p.fillRect(0, 0, w, 48, QtGui.QColor("#2b579a"))
+    p.fillRect(0, 48, 240, h - 48, QtGui.QColor("#e1e1e1"))
+    colors = ["#ffffff", "#dff0d8", "#fcf8e3", "#f2dede"]
+    for i, y in enumerate(range(72, h - 80, 90)):
+        for j, x in enumerate(range(264, w - 200, 220)):
+            p.setBrush(QtGui.QColor(colors[(i + j) % len(colors)]))
+            p.setPen(QtGui.QColor("#bbbbbb"))
+            p.drawRoundedRect(x, y, 200, 70, 6, 6)
+            p.setPen(QtGui.QColor("#333333"))
+            p.drawText(x + 12, y + 28, f"Panel {i}.{j}")
+    p.end()
+    return img
+
+
+def photo_image(w, h):
+    # Smooth gradients with sensor-like noise
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+    rgb = np.stack([128 + 100 * np.sin(xx / 97 + yy / 211),
+                    128 + 100 * np.sin(yy / 83),
+                    128 + 100 * np.cos((xx + yy) / 157)], axis=-1)
+    rgb += rng.normal(0, 6, rgb.shape)
+    img = QtGui.QImage(w, h, QtGui.QImage.Format_RGB32)
+    arr = sstaker.qimage_to_array(img, writable=True)
+    arr[:, :, 2::-1] = np.clip(rgb, 0, 255).astype(np.uint8)
+    arr[:, :, 3] = 255
+    return img
+
+
+CORPUS = {"text": text_image, "ui": ui_image, "photo": photo_image}
+
+
+def measure(encoder, image, repeat):
+    from PIL import Image
+    encode_ms, decode_ms = [], []
+    for _ in range(repeat):
+        # Encoders may convert their argument in place
+        copy = image.copy()
+        out = io.BytesIO()
+        start = time.perf_counter()
+        encoder.encode(copy, out)
+        encode_ms.append((time.perf_counter() - start) * 1000)
+        data = out.getvalue()
+        start = time.perf_counter()
+        Image.open(io.BytesIO(data)).load()
+        decode_ms.append((time.perf_counter() - start) * 1000)
+    return statistics.median(encode_ms), statistics.median(decode_ms), len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoder size/speed benchmark")
+    parser.add_argument("--size", default="1920x1080", help="WxH of each corpus image")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per encoder and image; the median is reported")
+    args = parser.parse_args()
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    app = QtGui.QGuiApplication([sys.argv[0]])
+    print(f"{'image':<7}{'encoder':<16}{'encode ms':>11}{'decode ms':>11}{'bytes':>12}")
+    for kind, make in CORPUS.items():
+        image = make(w, h)
+        for name, encoder in sstaker.ENCODERS.items():
+            encode_ms, decode_ms, size = measure(encoder, image, args.repeat)
+            default = " *" if name == sstaker.DEFAULT_ENCODER else ""
+            print(f"{kind:<7}{name:<16}{encode_ms:>11.1f}{decode_ms:>11.1f}{size:>12,}{default}")
+    del app
+
+
+if __name__ == "__main__":
+    main()
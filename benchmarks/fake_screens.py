@@ -0,0 +1,69 @@
+# Simulated monitor layouts for benchmarks on the offscreen platform, which
+# only has one screen. install() makes QGuiApplication.screens() return fake
+# screens and routes capture through a backend that hands back filled
+# pixmaps at each screen's native resolution.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore, QtGui
+import sstaker
+
+# (x, y, logical width, logical height, scale); like Qt, origins are in
+# device pixels and only the extent is scaled
+LAYOUTS = {
+    "1080p": [(0, 0, 1920, 1080, 1.0)],
+    "3x4k": [(0, 0, 3840, 2160, 1.0), (3840, 0, 3840, 2160, 1.0), (7680, 0, 3840, 2160, 1.0)],
+    "mixed": [(0, 0, 1920, 1080, 2.0), (3840, 0, 1920, 1080, 1.0), (5760, 0, 2048, 1152, 1.25)],
+}
+
+
+class FakeScreen:
+    def __init__(self, x, y, w, h, dpr, name="FAKE"):
+        self._geometry = QtCore.QRect(x, y, w, h)
+        self._dpr = dpr
+        self._name = name
+
+    def name(self):
+        return self._name
+
+    def geometry(self):
+        return QtCore.QRect(self._geometry)
+
+    def devicePixelRatio(self):
+        return self._dpr
+
+
+class FillBackend:
+    # A grab is a fresh pixmap per call, like a real backend
+    name = "fake"
+
+    def __init__(self):
+        self.grabs = 0
+        self.bytes = 0
+
+    def grab(self, screen, rect=None):
+        dpr = screen.devicePixelRatio()
+        size = screen.geometry().size() if rect is None else rect.size()
+        pixmap = QtGui.QPixmap(int(size.width() * dpr), int(size.height() * dpr))
+        pixmap.fill(QtGui.QColor(90, 120, 160))
+        pixmap.setDevicePixelRatio(dpr)
+        self.grabs += 1
+        self.bytes += pixmap.width() * pixmap.height() * 4
+        return pixmap
+
+
+def install(layout):
+    screens = [FakeScreen(*s, name=f"FAKE{i + 1}") for i, s in enumerate(LAYOUTS[layout])]
+    QtGui.QGuiApplication.screens = staticmethod(lambda: list(screens))
+    sstaker._capture_backend = FillBackend()
+    sstaker._window_source = sstaker.StaticWindowSource()
+    return sstaker._capture_backend
+
+
+def desktop(layout):
+    rect = QtCore.QRect()
+    for x, y, w, h, _ in LAYOUTS[layout]:
+        rect = rect.united(QtCore.QRect(x, y, w, h))
+    return rect
@@ -0,0 +1,95 @@
+# FramePublisher throughput: publishes synthetic frames in a loop and
+# reports frames/s and MB/s, alone or with consumer processes following the
+# ring and checksumming every frame from shared memory, as
+# `sstaker.py frames` does.
+#
+#   python benchmarks/frame_publish.py [--size 1920x1080] [--frames 500] [--consumers 1]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore, QtGui
+import sstaker
+
+CONSUMER = """
+import json, sys, time, zlib
+sys.path.insert(0, sys.argv[2])
+import sstaker
+consumer = sstaker.FrameConsumer(sys.argv[1], connect_ms=5000)
+print("ready", flush=True)
+count = total = torn = 0
+start = None
+for header, pixels in consumer.frames(2000):
+    start = start or time.perf_counter()
+    zlib.crc32(pixels)
+    torn += not consumer.valid(header)
+    pixels.release()
+    count += 1
+    total += header["bytes"]
+elapsed = time.perf_counter() - start if start else 0
+print(json.dumps({"frames": count, "bytes": total, "seconds": elapsed, "overwritten": torn}))
+consumer.close()
+"""
+
+
+def frames(w, h, count):
+    # A few distinct frames, so no cache makes repeats free
+    result = []
+    for i in range(count):
+        img = QtGui.QImage(w, h, QtGui.QImage.Format_RGB32)
+        img.fill(QtGui.QColor.fromHsv(i * 60 % 360, 200, 200))
+        result.append(img)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="shared-memory frame publishing throughput")
+    parser.add_argument("--size", default="1920x1080", help="WxH of each frame")
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--consumers", type=int, default=0, help="consumer processes to run alongside")
+    args = parser.parse_args()
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    app = QtCore.QCoreApplication([sys.argv[0]])
+    name = f"{sstaker.FRAMES_NAME}-bench{os.getpid()}"
+    publisher = sstaker.FramePublisher(w * h * 4, name)
+    consumers = [subprocess.Popen([sys.executable, "-c", CONSUMER, name, os.path.dirname(sstaker.__file__)],
+                                  stdout=subprocess.PIPE, text=True) for _ in range(args.consumers)]
+    try:
+        for consumer in consumers:
+            consumer.stdout.readline()  # Attached to the block
+        deadline = time.monotonic() + 5
+        while len(publisher.clients) < len(consumers) and time.monotonic() < deadline:
+            app.processEvents()
+        images = frames(w, h, 6)
+        rect = QtCore.QRect(0, 0, w, h)
+        start = time.perf_counter()
+        for i in range(args.frames):
+            publisher.publish(images[i % len(images)], rect)
+            app.processEvents()  # Notifications and disconnects
+        elapsed = time.perf_counter() - start
+        mb = publisher.published * w * h * 4 / (1024 * 1024)
+        print(f"{args.frames} frames of {w}x{h} ({w * h * 4 / (1024 * 1024):.1f} MB), "
+              f"{len(publisher.clients)} consumer(s)")
+        print(f"publisher  {publisher.published / elapsed:8.1f} frames/s {mb / elapsed:9.1f} MB/s")
+        publisher.close()
+        for i, consumer in enumerate(consumers):
+            result = json.loads(consumer.communicate(timeout=30)[0].splitlines()[-1])
+            seconds = result["seconds"] or float("inf")
+            print(f"consumer {i} {result['frames'] / seconds:8.1f} frames/s "
+                  f"{result['bytes'] / seconds / (1024 * 1024):9.1f} MB/s   "
+                  f"read {result['frames']}, overwritten while reading {result['overwritten']}")
+    finally:
+        for consumer in consumers:
+            if consumer.poll() is None:
+                consumer.kill()
+        if publisher.server.isListening():
+            publisher.close()
+
+
+if __name__ == "__main__":
+    main()
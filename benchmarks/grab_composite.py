@@ -0,0 +1,70 @@
+# Hotkey-to-overlay time and peak memory of the per-screen grab path against
+# the old path that composites every screen into one desktop-sized pixmap
+# (Overlay.grab_fullscreen(composite=True)), on a simulated monitor layout.
+# Each path runs in its own process so peak RSS is not shared.
+#
+#   python benchmarks/grab_composite.py [--layout 3x4k] [--repeat 10]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import fake_screens
+from fake_screens import sstaker
+from PyQt5 import QtGui, QtWidgets
+
+
+def first_frame(overlay):
+    # What each screen window paints on its first paintEvent
+    for window in overlay.screens:
+        if not window.isVisible():
+            continue
+        target = QtGui.QImage(window.area.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+        painter = QtGui.QPainter(target)
+        painter.translate(-window.area.topLeft())
+        overlay.paint(painter, window.area)
+        painter.end()
+
+
+def run(layout, composite, repeat):
+    app = QtWidgets.QApplication([])
+    fake_screens.install(layout)
+    overlay = sstaker.Overlay()
+    baseline = sstaker.peak_rss()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        screenshot, min_x, min_y = sstaker.Overlay.grab_fullscreen(composite=composite)
+        overlay.show_screenshot(screenshot, min_x, min_y, start)
+        first_frame(overlay)
+        times.append((time.perf_counter() - start) * 1000)
+        overlay.close()
+        app.processEvents()
+    return {"ms": statistics.median(times), "peak_mb": (sstaker.peak_rss() - baseline) / (1024 * 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="per-screen grabs vs one composited desktop pixmap")
+    parser.add_argument("--layout", choices=list(fake_screens.LAYOUTS), default="3x4k")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--child", choices=["tiles", "composite"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(run(args.layout, args.child == "composite", args.repeat)))
+        return
+    rect = fake_screens.desktop(args.layout)
+    print(f"layout {args.layout}: {len(fake_screens.LAYOUTS[args.layout])} screens, "
+          f"desktop {rect.width()}x{rect.height()}, {args.repeat} captures")
+    for mode in ("composite", "tiles"):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--layout", args.layout,
+                              "--repeat", str(args.repeat), "--child", mode],
+                             check=True, capture_output=True, text=True).stdout
+        result = json.loads(out.splitlines()[-1])
+        print(f"{mode:10s} hotkey-to-overlay {result['ms']:7.1f} ms   peak RSS +{result['peak_mb']:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
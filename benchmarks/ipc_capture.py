@@ -0,0 +1,94 @@
+# Latency of `sstaker.py capture` as a cold launch against the same command
+# handed to a running tray instance over the local socket, plus the bare
+# socket round trip without starting a client process. The instance runs
+# under a throwaway user name and home directory, so it doesn't meet a real
+# one. Offscreen has nothing to grab, so there both processes capture from
+# the simulated screens of fake_screens.py; pass --display to use the real
+# screens of the current session instead.
+#
+#   python benchmarks/ipc_capture.py [--runs 10] [--rect 0,0,800,600] [--display]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SSTAKER = os.path.join(HERE, "sstaker.py")
+# sstaker.py's entry point with simulated screens, and settings kept in the
+# throwaway home so the user's hotkey isn't registered a second time
+FAKE_MAIN = """
+import os, sys, fake_screens
+sstaker = fake_screens.sstaker
+fake_screens.install("1080p")
+home = os.path.expanduser("~")
+sstaker.HOTKEY_PATH = os.path.join(home, "hotkey.txt")
+sys.argv[0] = sstaker.__file__
+sstaker.main()
+"""
+
+
+def timed(fn, runs):
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[min(len(times) - 1, int(len(times) * 0.95))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cold capture vs capture through the running instance")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--rect", default="0,0,800,600", help="x,y,w,h to capture")
+    parser.add_argument("--display", action="store_true", help="capture the real screens")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as home:
+        user = f"bench{os.getpid()}"
+        env = dict(os.environ, HOME=home, USERPROFILE=home, USER=user, USERNAME=user)
+        if args.display:
+            launch = [sys.executable, SSTAKER]
+        else:
+            env.update(QT_QPA_PLATFORM="offscreen", PYTHONPATH=os.path.join(HERE, "benchmarks"))
+            launch = [sys.executable, "-c", FAKE_MAIN]
+        os.environ.update(USER=user, USERNAME=user)
+        sys.path.insert(0, HERE)
+        import sstaker
+
+        def cli(i):
+            out = os.path.join(home, f"{i}.png")
+            result = subprocess.run(launch + ["capture", "--rect", args.rect, "--out", out],
+                                    env=env, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise SystemExit(f"capture failed: {result.stderr.strip()}")
+
+        results = {"cold launch": timed(cli, args.runs)}
+        instance = subprocess.Popen(launch, env=env,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 30
+            while sstaker.send_command(["status"]) is None:
+                if time.monotonic() > deadline or instance.poll() is not None:
+                    raise SystemExit("the tray instance did not start")
+                time.sleep(0.1)
+            results["forwarded CLI"] = timed(cli, args.runs)
+
+            def socket_only(i):
+                reply = sstaker.send_command(["capture", "--rect", args.rect,
+                                              "--out", os.path.join(home, f"ipc{i}.png")])
+                assert reply and reply["ok"], reply
+
+            results["socket round trip"] = timed(socket_only, args.runs)
+        finally:
+            instance.terminate()
+            instance.wait()
+    print(f"capture --rect {args.rect}, {args.runs} runs")
+    for label, (p50, p95) in results.items():
+        print(f"{label:18s} p50 {p50:8.1f} ms   p95 {p95:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Per-frame paint time of a scripted selection drag. The overlay is driven
+# through Overlay.press/move/release; each frame repaints only the areas it
+# marked dirty, which is compared with repainting the whole screen through
+# the same paint() and with the original paintEvent (screenshot plus a
+# dimming fill clipped around the selection, every frame).
+#
+#   python benchmarks/overlay_drag.py [--layout 1080p] [--frames 200]
+import argparse
+import statistics
+import time
+
+import fake_screens
+from fake_screens import sstaker
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+def legacy_paint(painter, screenshot, area, start, end):
+    # The paintEvent this overlay started from
+    painter.drawPixmap(0, 0, screenshot)
+    rect = QtCore.QRect(start, end).normalized()
+    region = QtGui.QRegion(area).subtracted(QtGui.QRegion(rect))
+    painter.setOpacity(0.4)
+    painter.setClipRegion(region)
+    painter.fillRect(area, QtGui.QColor(0, 0, 0, 200))
+    painter.setClipping(False)
+    painter.setOpacity(1.0)
+    painter.setPen(QtGui.QPen(QtCore.Qt.red, 2))
+    painter.drawRect(rect)
+
+
+def drag_path(area, frames):
+    # Diagonal drag across most of the first screen
+    x0, y0 = area.left() + area.width() // 8, area.top() + area.height() // 8
+    dx = area.width() * 3 // 4 / frames
+    dy = area.height() * 3 // 4 / frames
+    return QtCore.QPoint(x0, y0), [QtCore.QPoint(int(x0 + dx * i), int(y0 + dy * i)) for i in range(1, frames + 1)]
+
+
+def percentiles(times):
+    times = sorted(times)
+    return statistics.median(times), times[min(len(times) - 1, int(len(times) * 0.95))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="overlay drag frame times")
+    parser.add_argument("--layout", choices=list(fake_screens.LAYOUTS), default="1080p")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+    app = QtWidgets.QApplication([])
+    fake_screens.install(args.layout)
+    overlay = sstaker.Overlay()
+    overlay.show_screenshot(*sstaker.Overlay.grab_fullscreen())
+    window = overlay.screens[0]
+    area = window.area
+    target = QtGui.QImage(area.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+    # Record the areas each input event damages instead of scheduling them
+    dirty = []
+    overlay.update = dirty.append
+
+    def frame(clip):
+        painter = QtGui.QPainter(target)
+        painter.translate(-area.topLeft())
+        start = time.perf_counter()
+        overlay.paint(painter, clip)
+        elapsed = (time.perf_counter() - start) * 1000
+        painter.end()
+        return elapsed
+
+    frame(area)  # First paint, counted as hotkey-to-overlay elsewhere
+    start, path = drag_path(area, args.frames)
+    partial, full, pixels = [], [], 0
+    overlay.press(start)
+    for pos in path:
+        dirty.clear()
+        overlay.move(pos, QtCore.Qt.NoModifier)
+        clip = QtCore.QRect()
+        for rect in dirty:
+            clip = clip.united(rect)
+        clip = clip.intersected(area)
+        pixels += clip.width() * clip.height()
+        partial.append(frame(clip))
+        full.append(frame(area))
+    overlay.release(path[-1])
+
+    composite = overlay.screenshot.composite()
+    legacy = []
+    for pos in path:
+        painter = QtGui.QPainter(target)
+        begin = time.perf_counter()
+        legacy_paint(painter, composite, QtCore.QRect(QtCore.QPoint(0, 0), area.size()), start, pos)
+        legacy.append((time.perf_counter() - begin) * 1000)
+        painter.end()
+    overlay.close()
+
+    print(f"layout {args.layout}: {area.width()}x{area.height()} screen, {args.frames} drag frames, "
+          f"{pixels / args.frames / (area.width() * area.height()):.1%} of the screen repainted per frame")
+    for label, times in (("dirty rect", partial), ("full repaint", full), ("original paintEvent", legacy)):
+        p50, p95 = percentiles(times)
+        print(f"{label:20s} p50 {p50:6.2f} ms   p95 {p95:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Paint time and memory of one overlay window per screen against the single
+# virtual-desktop window it replaced, on a simulated mixed-DPI layout. Each
+# window paints into a backing store at its screen's scale; the single
+# window gets one at the scale of the screen it opens on, covering the whole
+# desktop. Each mode runs in its own process so peak RSS is not shared.
+#
+#   python benchmarks/overlay_screens.py [--layout mixed] [--frames 100]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import fake_screens
+from fake_screens import sstaker
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+def backing_store(area, dpr):
+    store = QtGui.QImage(int(area.width() * dpr), int(area.height() * dpr),
+                         QtGui.QImage.Format_ARGB32_Premultiplied)
+    store.setDevicePixelRatio(dpr)
+    return store
+
+
+def paint(overlay, targets, clip):
+    # What each window's paintEvent does for a damaged clip
+    for area, store in targets:
+        part = clip.intersected(area)
+        if part.isEmpty():
+            continue
+        painter = QtGui.QPainter(store)
+        painter.translate(-area.topLeft())
+        overlay.paint(painter, part)
+        painter.end()
+
+
+def percentiles(times):
+    times = sorted(times)
+    return statistics.median(times), times[min(len(times) - 1, int(len(times) * 0.95))]
+
+
+def run(layout, single, frames):
+    app = QtWidgets.QApplication([])
+    fake_screens.install(layout)
+    overlay = sstaker.Overlay()
+    screenshot, min_x, min_y = sstaker.Overlay.grab_fullscreen()
+    overlay.show_screenshot(screenshot, min_x, min_y)
+    baseline = sstaker.peak_rss()
+    if single:
+        # Qt gives a window the scale of the screen it is on
+        targets = [(screenshot.rect, backing_store(screenshot.rect, screenshot.tiles[0][1].devicePixelRatio()))]
+    else:
+        targets = [(geo, backing_store(geo, pixmap.devicePixelRatio())) for geo, pixmap in screenshot.tiles]
+    start = time.perf_counter()
+    paint(overlay, targets, screenshot.rect)
+    first = (time.perf_counter() - start) * 1000
+    dirty = []
+    overlay.update = dirty.append
+    # A drag from the first screen onto the second
+    first_geo, second_geo = screenshot.tiles[0][0], screenshot.tiles[1][0]
+    begin = first_geo.topLeft() + QtCore.QPoint(100, 100)
+    end = QtCore.QPoint(second_geo.center().x(), second_geo.bottom() - 100)
+    overlay.press(begin)
+    times = []
+    for i in range(1, frames + 1):
+        dirty.clear()
+        overlay.move(begin + (end - begin) * i / frames, QtCore.Qt.NoModifier)
+        clip = QtCore.QRect()
+        for rect in dirty:
+            clip = clip.united(rect)
+        start = time.perf_counter()
+        paint(overlay, targets, clip)
+        times.append((time.perf_counter() - start) * 1000)
+    p50, p95 = percentiles(times)
+    return {"first_ms": first, "p50": p50, "p95": p95,
+            "store_mb": sum(store.byteCount() for _, store in targets) / (1024 * 1024),
+            "peak_mb": (sstaker.peak_rss() - baseline) / (1024 * 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="per-screen overlay windows vs one desktop-sized window")
+    parser.add_argument("--layout", choices=list(fake_screens.LAYOUTS), default="mixed")
+    parser.add_argument("--frames", type=int, default=100, help="drag frames")
+    parser.add_argument("--child", choices=["single", "per-screen"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(run(args.layout, args.child == "single", args.frames)))
+        return
+    screens = ", ".join(f"{w}x{h}@{dpr:g}" for _, _, w, h, dpr in fake_screens.LAYOUTS[args.layout])
+    print(f"layout {args.layout}: {screens}; {args.frames} drag frames across two screens")
+    for mode in ("single", "per-screen"):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--layout", args.layout,
+                              "--frames", str(args.frames), "--child", mode],
+                             check=True, capture_output=True, text=True).stdout
+        r = json.loads(out.splitlines()[-1])
+        print(f"{mode:10s} first frame {r['first_ms']:7.1f} ms   drag p50 {r['p50']:6.2f} ms  p95 {r['p95']:6.2f} ms   "
+              f"backing stores {r['store_mb']:6.1f} MB   peak RSS +{r['peak_mb']:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
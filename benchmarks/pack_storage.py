@@ -0,0 +1,99 @@
+# Captures/s, directory-walk time and full-read time for a day of captures
+# stored in a CapturePack against one file per capture. Captures are
+# incompressible blobs of a screenshot-like size; both stores are timed with
+# a warm page cache.
+#
+#   python benchmarks/pack_storage.py [--captures 2000] [--size 200]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sstaker
+
+
+def blobs(count, size_kb):
+    # A few distinct payloads, sized +-50% around size_kb
+    payload = os.urandom(size_kb * 1024 * 3 // 2)
+    return [payload[:size_kb * 512 + (i * 7919) % (size_kb * 1024)] for i in range(count)]
+
+
+def write_files(folder, data):
+    start = time.perf_counter()
+    for i, blob in enumerate(data):
+        path = sstaker.unique_path(folder, f"{i:06d}", "png")
+        with open(path, "wb") as f:
+            f.write(blob)
+    return time.perf_counter() - start
+
+
+def write_pack(folder, data):
+    start = time.perf_counter()
+    pack = sstaker.CapturePack(os.path.join(folder, sstaker.PackStore.NAME))
+    for i, blob in enumerate(data):
+        pack.append(pack.reserve(f"{i:06d}", "png"), blob, time.time())
+    pack.close()
+    return time.perf_counter() - start
+
+
+def walk_files(folder):
+    # What a rescan, backup or virus scan does first: list and stat everything
+    start = time.perf_counter()
+    entries = [(f.name, f.stat().st_size) for f in os.scandir(folder)]
+    return time.perf_counter() - start, len(entries)
+
+
+def walk_pack(folder):
+    # The folder holds the pack and its index; the captures are in the index
+    start = time.perf_counter()
+    entries = [(f.name, f.stat().st_size) for f in os.scandir(folder)]
+    pack = sstaker.CapturePack(os.path.join(folder, sstaker.PackStore.NAME), writable=False)
+    return time.perf_counter() - start, len(pack.names())
+
+
+def read_files(folder):
+    start = time.perf_counter()
+    total = 0
+    for f in os.scandir(folder):
+        with open(f.path, "rb") as fh:
+            total += len(fh.read())
+    return time.perf_counter() - start, total
+
+
+def read_pack(folder):
+    start = time.perf_counter()
+    pack = sstaker.CapturePack(os.path.join(folder, sstaker.PackStore.NAME), writable=False)
+    total = sum(len(pack.read(name)) for name in pack.names())
+    return time.perf_counter() - start, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pack file vs one file per capture")
+    parser.add_argument("--captures", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=200, help="average capture size in KB")
+    parser.add_argument("--dir", help="where to write (default: a temporary directory)")
+    args = parser.parse_args()
+    data = blobs(args.captures, args.size)
+    mb = sum(len(blob) for blob in data) / (1024 * 1024)
+    print(f"{args.captures} captures, {mb:.0f} MB; the pack fsyncs every {sstaker.CapturePack.SYNC_EVERY} "
+          f"captures, single files are left to the OS")
+    with tempfile.TemporaryDirectory(dir=args.dir) as root:
+        files_dir = os.path.join(root, "files")
+        pack_dir = os.path.join(root, "pack")
+        os.makedirs(files_dir)
+        os.makedirs(pack_dir)
+        for label, folder, write, walk, read in (("files", files_dir, write_files, walk_files, read_files),
+                                                 ("pack", pack_dir, write_pack, walk_pack, read_pack)):
+            wall = write(folder, data)
+            walk_s, count = walk(folder)
+            read_s, total = read(folder)
+            assert count == len(data), (label, count)
+            print(f"{label:6s} write {len(data) / wall:8.0f} captures/s   walk {walk_s * 1000:7.1f} ms   "
+                  f"read all {read_s * 1000:7.1f} ms ({total / (1024 * 1024) / read_s:6.0f} MB/s)   "
+                  f"{len(os.listdir(folder))} directory entries")
+
+
+if __name__ == "__main__":
+    main()
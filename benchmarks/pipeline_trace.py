@@ -0,0 +1,110 @@
+# Replays the capture pipeline offscreen (hotkey trigger, grab, overlay,
+# first paint, drag, crop, save queue encode) with tracing off and on, in
+# alternating rounds, and prints the per-capture wall time of each plus the
+# stage summary the tray shows. The cost of a single span is measured on
+# its own as well, since it is far below the noise of a whole capture.
+#
+#   python benchmarks/pipeline_trace.py [--layout 1080p] [--captures 30]
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import fake_screens
+from fake_screens import sstaker
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+def span_cost(tracer, calls=200000):
+    start = time.perf_counter()
+    for _ in range(calls):
+        with tracer.span("bench"):
+            pass
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+class Pipeline:
+    def __init__(self, app, folder, encoder):
+        self.app = app
+        self.folder = folder
+        self.encoder = sstaker.ENCODERS[encoder]
+        self.overlay = sstaker.Overlay()
+        self.scheduler = sstaker.CaptureScheduler(self.show)
+        self.overlay.closed.connect(self.scheduler.finished)
+        self.overlay.selection_made.connect(self.save)
+        self.queue = sstaker.SaveQueue()
+        self.count = 0
+
+    def show(self, triggered_at):
+        screenshot, min_x, min_y = sstaker.Overlay.grab_fullscreen()
+        with sstaker.tracer.span("show_overlay"):
+            self.overlay.show_screenshot(screenshot, min_x, min_y, triggered_at)
+
+    def save(self, rect, img):
+        self.count += 1
+        path = os.path.join(self.folder, f"{self.count}.{self.encoder.ext}")
+        self.queue.submit(img, path, self.encoder)
+
+    def capture(self):
+        start = time.perf_counter()
+        self.scheduler.trigger()
+        self.app.processEvents()
+        window = self.overlay.screens[0]
+        target = QtGui.QImage(window.area.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+        painter = QtGui.QPainter(target)
+        painter.translate(-window.area.topLeft())
+        self.overlay.paint(painter, window.area)
+        painter.end()
+        area = window.area
+        self.overlay.press(area.topLeft() + QtCore.QPoint(100, 100))
+        for i in range(1, 11):
+            self.overlay.move(area.topLeft() + QtCore.QPoint(100 + 80 * i, 100 + 50 * i), QtCore.Qt.NoModifier)
+        self.overlay.release(area.topLeft() + QtCore.QPoint(900, 600))
+        self.overlay.save_selection()
+        self.app.processEvents()
+        self.queue.drain()
+        self.app.processEvents()
+        return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="capture pipeline cost with tracing off and on")
+    parser.add_argument("--layout", choices=list(fake_screens.LAYOUTS), default="1080p")
+    parser.add_argument("--captures", type=int, default=30, help="captures per mode")
+    parser.add_argument("--format", choices=list(sstaker.ENCODERS), default=sstaker.DEFAULT_ENCODER)
+    args = parser.parse_args()
+    app = QtWidgets.QApplication([])
+    fake_screens.install(args.layout)
+    tracer = sstaker.tracer
+    with tempfile.TemporaryDirectory() as folder:
+        pipeline = Pipeline(app, folder, args.format)
+        pipeline.capture()  # Warm up
+        times = {False: [], True: []}
+        for _ in range(args.captures):
+            for enabled in (False, True):
+                tracer.enabled = enabled
+                times[enabled].append(pipeline.capture())
+        tracer.enabled = False
+        summary = tracer.summary()
+        spans = len(tracer.events) / args.captures
+        tracer.events.clear()
+        off = span_cost(tracer)
+        tracer.enabled = True
+        on = span_cost(tracer)
+        tracer.events.clear()
+        tracer.enabled = False
+    print(f"layout {args.layout}, {args.captures} captures per mode, {args.format} encoder")
+    for enabled in (False, True):
+        values = sorted(times[enabled])
+        print(f"tracing {'on ' if enabled else 'off'}  p50 {statistics.median(values):7.2f} ms   "
+              f"p95 {values[min(len(values) - 1, int(len(values) * 0.95))]:7.2f} ms")
+    print(f"one span: {off:.0f} ns disabled, {on:.0f} ns enabled; {spans:.0f} spans per capture, "
+          f"so tracing adds about {spans * (on - off) / 1000:.1f} us to a capture")
+    print(f"{'stage':<24}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, (count, p50, p95) in summary.items():
+        print(f"{name:<24}{count:>5}{p50:>10.2f}{p95:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Cost of PostProcessor.apply and the output bytes it saves, for each
+# setting in the tray's Before Saving menu, on the synthetic corpus of
+# benchmarks/encoders.py. Output is encoded with the default encoder.
+#
+#   python benchmarks/postprocess.py [--size 1920x1080] [--repeat 5]
+import argparse
+import io
+import statistics
+import sys
+import time
+
+from encoders import CORPUS, sstaker
+from PyQt5 import QtGui
+
+# Three secrets: a line of text, a panel and a strip across the width
+REDACTIONS = [(200, 150, 600, 24), (900, 400, 420, 260), (0, 900, 1920, 60)]
+
+SETTINGS = {
+    "none": (sstaker.PostProcessor(), ()),
+    "redact pixelate": (sstaker.PostProcessor("pixelate"), REDACTIONS),
+    "redact fill": (sstaker.PostProcessor("fill"), REDACTIONS),
+    "max 1280": (sstaker.PostProcessor(max_dim=1280), ()),
+    "256 colours": (sstaker.PostProcessor(colors=256), ()),
+    "max 1280 + 256": (sstaker.PostProcessor(max_dim=1280, colors=256), ()),
+}
+
+
+def measure(post, redactions, image, encoder, repeat):
+    stage_ms, encode_ms = [], []
+    for _ in range(repeat):
+        # The encoder converts its argument in place, so each run starts
+        # from a fresh copy
+        copy = image.copy()
+        start = time.perf_counter()
+        out = post.apply(copy, redactions)
+        stage_ms.append((time.perf_counter() - start) * 1000)
+        buf = io.BytesIO()
+        start = time.perf_counter()
+        encoder.encode(out, buf)
+        encode_ms.append((time.perf_counter() - start) * 1000)
+    return statistics.median(stage_ms), statistics.median(encode_ms), len(buf.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="post-processing cost and bytes saved")
+    parser.add_argument("--size", default="1920x1080", help="WxH of each corpus image")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per setting; the median is reported")
+    parser.add_argument("--format", choices=list(sstaker.ENCODERS), default=sstaker.DEFAULT_ENCODER)
+    args = parser.parse_args()
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    encoder = sstaker.ENCODERS[args.format]
+    app = QtGui.QGuiApplication([sys.argv[0]])
+    print(f"{'image':<7}{'setting':<17}{'stage ms':>10}{'encode ms':>11}{'bytes':>12}{'saved':>8}")
+    for kind, make in CORPUS.items():
+        image = make(w, h)
+        plain = None
+        for name, (post, redactions) in SETTINGS.items():
+            stage_ms, encode_ms, size = measure(post, redactions, image, encoder, args.repeat)
+            plain = plain or size
+            print(f"{kind:<7}{name:<17}{stage_ms:>10.1f}{encode_ms:>11.1f}{size:>12,}{1 - size / plain:>8.0%}")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Latency and bytes grabbed for capturing a region preset (grab_region on
+# just its rectangle) against the overlay flow it skips (grab every screen,
+# show the overlay, paint the first frame, select the same rectangle and
+# crop it), on a simulated monitor layout.
+#
+#   python benchmarks/preset_grab.py [--layout 3x4k] [--rect 4000,200,800,600]
+import argparse
+import statistics
+import time
+
+import fake_screens
+from fake_screens import sstaker
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+def preset(rect):
+    grab = sstaker.grab_region(rect)
+    image = grab.copy_image(grab.rect)
+    grab.release()
+    return image
+
+
+def overlay_flow(overlay, rect):
+    screenshot, min_x, min_y = sstaker.Overlay.grab_fullscreen()
+    overlay.show_screenshot(screenshot, min_x, min_y)
+    for window in overlay.screens:
+        if window.isVisible():
+            target = QtGui.QImage(window.area.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+            painter = QtGui.QPainter(target)
+            painter.translate(-window.area.topLeft())
+            overlay.paint(painter, window.area)
+            painter.end()
+    selection = rect.translated(-min_x, -min_y)
+    overlay.press(selection.topLeft())
+    overlay.move(selection.bottomRight(), QtCore.Qt.NoModifier)
+    overlay.release(selection.bottomRight())
+    image = overlay.screenshot.copy_image(overlay.selection_rect)
+    overlay.close()
+    return image
+
+
+def measure(backend, run, repeat):
+    times = []
+    backend.bytes = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        image = run()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), backend.bytes / repeat, image
+
+
+def main():
+    parser = argparse.ArgumentParser(description="region preset vs full overlay capture")
+    parser.add_argument("--layout", choices=list(fake_screens.LAYOUTS), default="3x4k")
+    parser.add_argument("--rect", default="4000,200,800,600", help="x,y,w,h in virtual desktop coordinates")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    rect = QtCore.QRect(*[int(v) for v in args.rect.split(",")])
+    app = QtWidgets.QApplication([])
+    backend = fake_screens.install(args.layout)
+    overlay = sstaker.Overlay()
+    overlay_flow(overlay, rect)  # Warm up
+    app.processEvents()
+    mb = 1024 * 1024
+    print(f"layout {args.layout}, region {rect.width()}x{rect.height()} at ({rect.x()}, {rect.y()})")
+    for label, run in (("overlay", lambda: overlay_flow(overlay, rect)), ("preset", lambda: preset(rect))):
+        ms, grabbed, image = measure(backend, run, args.repeat)
+        app.processEvents()
+        print(f"{label:8s} {ms:8.1f} ms   grabbed {grabbed / mb:7.1f} MB   result {image.width()}x{image.height()}")
+
+
+if __name__ == "__main__":
+    main()
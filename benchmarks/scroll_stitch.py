@@ -0,0 +1,46 @@
+# Stitch throughput of ScrollStitcher in rows per second, on a synthetic
+# text page scrolled by a fixed step per frame.
+#
+#   python benchmarks/scroll_stitch.py [--width 1920] [--frame 1000] [--step 120]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sstaker
+
+
+def make_page(height, width, seed=0):
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width, 4), 255, np.uint8)
+    for top in range(0, height - 12, 18):
+        line = rng.integers(0, 2, (12, width)).astype(bool) & (rng.random(width) < 0.7)
+        page[top:top + 12][line] = (40, 40, 40, 255)
+    return page
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ScrollStitcher throughput")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--frame", type=int, default=1000, help="frame height in rows")
+    parser.add_argument("--step", type=int, default=120, help="rows scrolled between frames")
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+    page = make_page(args.frame + args.step * args.frames, args.width)
+    frames = [np.ascontiguousarray(page[i * args.step:i * args.step + args.frame]) for i in range(args.frames)]
+    stitcher = sstaker.ScrollStitcher(max_height=len(page))
+    start = time.perf_counter()
+    for f in frames:
+        stitcher.add(f)
+    wall = time.perf_counter() - start
+    stitcher.file.close()
+    print(f"{args.frames} frames of {args.width}x{args.frame}, {args.step} rows apart")
+    print(f"stitched {stitcher.height} rows in {wall * 1000:.0f} ms: "
+          f"{stitcher.height / wall:,.0f} rows/s, {len(frames) / wall:.1f} frames/s, gaps {len(stitcher.gaps)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import sstaker
+
+
+def filled(tmp_path, count=3):
+    # A closed pack holding count records; returns its path and their bytes
+    path = str(tmp_path / "captures.pack")
+    pack = sstaker.CapturePack(path)
+    records = {}
+    for i in range(count):
+        name = pack.reserve("shot", "png")
+        records[name] = bytes([i]) * (1000 + i)
+        pack.append(name, records[name], 1000.0 + i)
+    pack.close()
+    return path, records
+
+
+def index_lines(pack):
+    with open(pack.index_path) as f:
+        return f.read().splitlines()
+
+
+def test_records_survive_reopening(tmp_path):
+    path, records = filled(tmp_path)
+    pack = sstaker.CapturePack(path)
+    assert pack.names() == list(records)
+    assert all(pack.read(name) == data for name, data in records.items())
+    pack.close()
+
+
+def test_partially_written_tail_is_cut_off(tmp_path):
+    path, records = filled(tmp_path)
+    last = list(records)[-1]
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - 10)  # The last record's data was cut short
+    pack = sstaker.CapturePack(path)
+    assert pack.names() == list(records)[:-1]
+    assert os.path.getsize(path) == size - sstaker.CapturePack.HEADER.size - len(last) - len(records[last])
+    assert len(index_lines(pack)) == 2
+    # Appends carry on from the last good record
+    pack.append(last, b"again", 2000.0)
+    pack.close()
+    pack = sstaker.CapturePack(path, writable=False)
+    assert pack.names() == list(records)
+    assert pack.read(last) == b"again"
+    assert all(pack.read(name) == records[name] for name in list(records)[:-1])
+
+
+def test_torn_header_is_cut_off(tmp_path):
+    path, records = filled(tmp_path)
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        # A crash after only part of the next record's header was written
+        f.write(sstaker.CapturePack.HEADER.pack(sstaker.CapturePack.MAGIC, 9, 50, 0, 0.0)[:7])
+    pack = sstaker.CapturePack(path)
+    assert pack.names() == list(records)
+    assert os.path.getsize(path) == size
+    pack.close()
+
+
+def test_records_missing_from_the_index_are_recovered(tmp_path):
+    path, records = filled(tmp_path)
+    index_path = os.path.splitext(path)[0] + ".idx"
+    with open(index_path) as f:
+        lines = f.read().splitlines(keepends=True)
+    with open(index_path, "w") as f:
+        # The last line was only half written, the one before never was
+        f.write(lines[0] + lines[2][:15])
+    pack = sstaker.CapturePack(path)
+    assert pack.names() == list(records)
+    assert all(pack.read(name) == data for name, data in records.items())
+    # The index is rewritten whole, so the next open needs no scan
+    assert [line.endswith("}") for line in index_lines(pack)] == [True] * 3
+    pack.close()
+
+
+def test_corrupt_tail_record_is_dropped(tmp_path):
+    path, records = filled(tmp_path)
+    with open(path, "r+b") as f:
+        f.seek(-5, os.SEEK_END)
+        f.write(b"\xff" * 5)  # Written but never made it to disk intact
+    pack = sstaker.CapturePack(path)
+    assert pack.names() == list(records)[:-1]
+    pack.close()
@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtGui, QtWidgets
+import sstaker
+
+# Large enough that a leaked grab shows up in RSS, and above glibc's 32 MiB
+# ceiling for its dynamic mmap threshold, so every grab is mapped and
+# unmapped on its own rather than sometimes left resident in the heap
+GRAB_W, GRAB_H = 4096, 2304
+
+
+class BigBackend:
+    name = "test"
+
+    def grab(self, screen, rect=None):
+        pixmap = QtGui.QPixmap(GRAB_W, GRAB_H)
+        pixmap.fill(QtGui.QColor("gray"))
+        return pixmap
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    saved = sstaker._capture_backend
+    sstaker._capture_backend = BigBackend()
+    yield app
+    sstaker._capture_backend = saved
+
+
+def wire(policy):
+    # The same wiring as MainWindow: the scheduler shows the overlay, and the
+    # overlay closing ends the capture
+    overlay = sstaker.Overlay()
+    shown = []
+
+    def show(triggered_at):
+        shown.append(triggered_at)
+        screenshot, min_x, min_y = sstaker.Overlay.grab_fullscreen()
+        overlay.show_screenshot(screenshot, min_x, min_y, triggered_at)
+
+    scheduler = sstaker.CaptureScheduler(show, policy)
+    overlay.closed.connect(scheduler.finished)
+    return overlay, scheduler, shown
+
+
+def fire(scheduler, count):
+    # From another thread, like the keyboard hook
+    thread = threading.Thread(target=lambda: [scheduler.trigger() for _ in range(count)])
+    thread.start()
+    thread.join()
+
+
+def test_drop_runs_one_capture_per_burst(app):
+    overlay, scheduler, shown = wire("drop")
+    fire(scheduler, 200)
+    app.processEvents()
+    assert len(shown) == 1
+    assert scheduler.dropped == 199
+    overlay.close()
+    app.processEvents()
+    assert not scheduler.active
+    assert overlay.screenshot is None and overlay.dimmed is None
+
+
+def test_coalesce_reruns_once(app):
+    overlay, scheduler, shown = wire("coalesce")
+    fire(scheduler, 200)
+    app.processEvents()
+    assert len(shown) == 1
+    overlay.close()
+    app.processEvents()
+    assert len(shown) == 2
+    overlay.close()
+    app.processEvents()
+    assert len(shown) == 2 and not scheduler.active
+
+
+def test_peak_memory_bounded_under_trigger_storm(app):
+    overlay, scheduler, shown = wire("drop")
+    screens = len(QtGui.QGuiApplication.screens())
+    grab_bytes = screens * GRAB_W * GRAB_H * 4
+    # Warm up: one full capture so the baseline includes a live grab and its
+    # dimmed copy
+    fire(scheduler, 1)
+    app.processEvents()
+    overlay.close()
+    app.processEvents()
+    baseline = sstaker.peak_rss()
+    rounds = 20
+    for _ in range(rounds):
+        fire(scheduler, 25)
+        app.processEvents()
+        overlay.close()
+        app.processEvents()
+    assert len(shown) == rounds + 1
+    # 500 triggers; if grabs or overlays were kept the peak would grow by
+    # about two grabs per round
+    assert sstaker.peak_rss() - baseline < grab_bytes
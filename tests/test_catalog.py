@@ -0,0 +1,47 @@
+import os
+import sys
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sstaker
+
+
+def make_captures(root, count):
+    day = root / "17-Oct-2026"
+    day.mkdir(parents=True)
+    paths = []
+    for i in range(count):
+        path = day / f"{i}.png"
+        Image.new("RGB", (64, 48), (40 * i, 100, 200)).save(path)
+        paths.append(path)
+    return paths
+
+
+def thumbs(catalog):
+    return sorted(os.listdir(catalog.thumb_dir))
+
+
+def test_rescan_removes_thumbnails_of_deleted_captures(tmp_path):
+    paths = make_captures(tmp_path / "Pictures", 3)
+    catalog = sstaker.CaptureCatalog(str(tmp_path / "catalog"))
+    assert catalog.rescan(str(tmp_path / "Pictures")) == (3, 0)
+    assert len(thumbs(catalog)) == 3
+    paths[2].unlink()
+    assert catalog.rescan(str(tmp_path / "Pictures")) == (0, 1)
+    ids = [row[0] for row in catalog.db.execute("SELECT capture_id FROM thumbs ORDER BY capture_id")]
+    assert thumbs(catalog) == [f"{i}.jpg" for i in ids]
+
+
+def test_changed_capture_keeps_its_id(tmp_path):
+    paths = make_captures(tmp_path / "Pictures", 2)
+    catalog = sstaker.CaptureCatalog(str(tmp_path / "catalog"))
+    catalog.rescan(str(tmp_path / "Pictures"))
+    before = dict(catalog.db.execute("SELECT path, id FROM captures"))
+    Image.new("RGB", (80, 60), (0, 0, 0)).save(paths[0])
+    os.utime(paths[0], (1, 1))
+    assert catalog.rescan(str(tmp_path / "Pictures")) == (1, 0)
+    assert dict(catalog.db.execute("SELECT path, id FROM captures")) == before
+    assert len(thumbs(catalog)) == 2
+    width, = catalog.db.execute("SELECT width FROM captures WHERE path = ?", (str(paths[0]),)).fetchone()
+    assert width == 80
@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore, QtGui, QtWidgets
+import sstaker
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def image():
+    img = QtGui.QImage(64, 48, QtGui.QImage.Format_RGB32)
+    img.fill(QtGui.QColor("teal"))
+    return img
+
+
+def pasted_file(data):
+    url = bytes(data.retrieveData(data.URLS, QtCore.QVariant.ByteArray)).strip()
+    return QtCore.QUrl.fromEncoded(url).toLocalFile()
+
+
+def test_file_url_removed_when_clipboard_replaced(app):
+    clipboard = app.clipboard()
+    data = sstaker.LazyImageMimeData(image())
+    clipboard.setMimeData(data)
+    path = pasted_file(data)
+    assert QtGui.QImage(path).size() == QtCore.QSize(64, 48)
+    clipboard.setMimeData(sstaker.LazyImageMimeData(image()))
+    assert not os.path.exists(path)
+
+
+def test_clear_files_removes_leftovers(app):
+    folder = sstaker.LazyImageMimeData.folder()
+    os.makedirs(folder)
+    open(os.path.join(folder, "old.png"), "wb").close()
+    sstaker.LazyImageMimeData.clear_files()
+    assert os.listdir(folder) == []
+
+
+def test_copy_selection_is_timed(app):
+    overlay = sstaker.Overlay()
+    tile = QtGui.QPixmap(200, 100)
+    tile.fill(QtGui.QColor("teal"))
+    overlay.show_screenshot(sstaker.ScreenGrab([(QtCore.QRect(0, 0, 200, 100), tile)], QtCore.QPoint(0, 0)))
+    copied = []
+    overlay.copied.connect(lambda rect, img: copied.append(rect))
+    overlay.press(QtCore.QPoint(10, 10))
+    overlay.release(QtCore.QPoint(60, 40))
+    overlay.copy_selection()
+    assert copied == [QtCore.QRect(QtCore.QPoint(10, 10), QtCore.QPoint(60, 40))]
+    assert len(overlay.copy_times) == 1 and overlay.copy_times[0] > 0
+    assert app.clipboard().image().size() == QtCore.QSize(51, 31)
+
+
+def test_post_processing_runs_off_the_gui_thread(app):
+    threads = []
+
+    def post(img):
+        threads.append(threading.get_ident())
+        return img.scaled(32, 24)
+
+    data = sstaker.LazyImageMimeData(image())
+    ready = []
+    data.ready.connect(lambda img: ready.append((threading.get_ident(), img.size())))
+    data.process(post)
+    # A paste that comes in first waits for the result
+    assert QtGui.QImage(data.retrieveData(data.IMAGE, QtCore.QVariant.Image)).size() == QtCore.QSize(32, 24)
+    deadline = time.monotonic() + 5
+    while not ready and time.monotonic() < deadline:
+        app.processEvents()
+    assert threads and threads[0] != threading.get_ident()
+    assert ready == [(threading.get_ident(), QtCore.QSize(32, 24))]
+
+
+def test_copy_selection_publishes_the_processed_image(app):
+    overlay = sstaker.Overlay()
+    overlay.post = sstaker.PostProcessor(max_dim=20)
+    tile = QtGui.QPixmap(200, 100)
+    tile.fill(QtGui.QColor("teal"))
+    overlay.show_screenshot(sstaker.ScreenGrab([(QtCore.QRect(0, 0, 200, 100), tile)], QtCore.QPoint(0, 0)))
+    copied = []
+    overlay.copied.connect(lambda rect, img: copied.append(img.size()))
+    overlay.press(QtCore.QPoint(0, 0))
+    overlay.release(QtCore.QPoint(99, 49))
+    overlay.copy_selection()
+    deadline = time.monotonic() + 5
+    while not copied and time.monotonic() < deadline:
+        app.processEvents()
+    assert copied == [QtCore.QSize(20, 10)]
+    assert app.clipboard().image().size() == QtCore.QSize(20, 10)
+
+
+def test_held_bytes_and_encode_times_are_reported(app):
+    data = sstaker.LazyImageMimeData(image())
+    app.clipboard().setMimeData(data)
+    assert data.stats() == {"held_bytes": 64 * 48 * 4, "encode_ms": {}}
+    png = bytes(data.retrieveData(data.PNG, QtCore.QVariant.ByteArray))
+    stats = app.clipboard().mimeData().stats()
+    assert stats["held_bytes"] == 64 * 48 * 4 + len(png)
+    assert list(stats["encode_ms"]) == ["png"] and stats["encode_ms"]["png"] >= 0
@@ -0,0 +1,106 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore, QtGui, QtWidgets
+import sstaker
+
+
+class FillBackend:
+    name = "test"
+
+    def grab(self, screen, rect=None):
+        size = screen.geometry().size() if rect is None else rect.size()
+        pixmap = QtGui.QPixmap(size)
+        pixmap.fill(QtGui.QColor("teal"))
+        return pixmap
+
+
+class Window(QtCore.QObject):
+    # The parts of MainWindow the command server uses
+    pack_store = sstaker.MainWindow.pack_store
+    publish_frame = sstaker.MainWindow.publish_frame
+
+    def __init__(self, folder):
+        super().__init__()
+        self.catalog = sstaker.CaptureCatalog(folder)
+        self.save_queue = sstaker.SaveQueue(catalog=self.catalog, parent=self)
+        self.packs = None
+        self.publisher = None
+        self.overlay = None
+        self.hotkey_str = ""
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    monkeypatch.setattr(sstaker, "SERVER_NAME", f"{sstaker.SERVER_NAME}-test{os.getpid()}")
+    monkeypatch.setattr(sstaker, "_capture_backend", FillBackend())
+    window = Window(str(tmp_path / "catalog"))
+    server = sstaker.CommandServer(window)
+    assert server.listen()
+    yield app, server
+    server.server.close()
+    window.save_queue.drain()
+    if window.packs is not None:
+        window.packs.close()
+
+
+def send(app, argv):
+    # The client blocks on its socket, so it runs on a thread of its own
+    # while this one serves the connection
+    reply = []
+    client = threading.Thread(target=lambda: reply.append(sstaker.send_command(argv)))
+    client.start()
+    deadline = time.monotonic() + 10
+    while client.is_alive() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    client.join()
+    return reply[0]
+
+
+def test_capture_to_file_is_saved_and_catalogued(server, tmp_path):
+    app, command_server = server
+    out = str(tmp_path / "shot.png")
+    reply = send(app, ["capture", "--rect", "0,0,120,80", "--out", out])
+    assert reply["ok"] and reply["path"] == out
+    assert QtGui.QImage(out).size() == QtCore.QSize(120, 80)
+    rows = list(command_server.window.catalog.db.execute("SELECT path, w, h FROM captures"))
+    assert rows == [(out, 120, 80)]
+    assert not command_server.pending
+
+
+def test_capture_into_pack(server, tmp_path):
+    app, command_server = server
+    out = str(tmp_path / "17-Oct-2026" / sstaker.PackStore.NAME / "shot.png")
+    reply = send(app, ["capture", "--rect", "0,0,64,48", "--out", out])
+    assert reply["ok"], reply
+    command_server.window.packs.close()
+    img = sstaker.open_capture(out)
+    assert img.size == (64, 48)
+
+
+def test_errors_are_replied(server):
+    app, command_server = server
+    reply = send(app, ["capture", "--rect", "not,a,rect"])
+    assert reply == {"ok": False, "error": "--rect must be x,y,w,h"}
+    assert send(app, ["nope"]) == {"ok": False, "error": "unknown command: nope"}
+
+
+def test_status(server):
+    app, command_server = server
+    reply = send(app, ["status"])
+    assert reply["ok"] and reply["pid"] == os.getpid() and reply["saving"] == 0
+
+
+def test_status_reports_the_clipboard(server):
+    app, command_server = server
+    img = QtGui.QImage(10, 10, QtGui.QImage.Format_RGB32)
+    app.clipboard().setMimeData(sstaker.LazyImageMimeData(img))
+    assert send(app, ["status"])["clipboard"] == {"held_bytes": 400, "encode_ms": {}}
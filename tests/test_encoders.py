@@ -0,0 +1,88 @@
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtGui
+import sstaker
+
+LOSSLESS = ["png", "png-small", "webp-lossless", "qt-png"]
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+
+def shot(seed=0, w=53, h=37, fmt=QtGui.QImage.Format_RGB32):
+    # Noisy capture with an odd width, so rows carry padding
+    img = QtGui.QImage(w, h, QtGui.QImage.Format_RGB32)
+    arr = sstaker.qimage_to_array(img, writable=True)
+    arr[..., :3] = np.random.default_rng(seed).integers(0, 256, (h, w, 3), dtype=np.uint8)
+    arr[..., 3] = 255
+    return img.convertToFormat(fmt)
+
+
+def decoded(data):
+    with Image.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert("RGBA"))
+
+
+def encode(name, img, to_file=None):
+    # Bytes written by encoder name, to a path if given, else a file object
+    encoder = sstaker.ENCODERS[name]
+    if to_file is not None:
+        encoder.encode(QtGui.QImage(img), to_file)
+        with open(to_file, "rb") as f:
+            return f.read()
+    buf = io.BytesIO()
+    encoder.encode(QtGui.QImage(img), buf)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("fmt", [QtGui.QImage.Format_RGB32, QtGui.QImage.Format_ARGB32,
+                                 QtGui.QImage.Format_RGBA8888])
+def test_lossless_encoders_decode_to_the_same_pixels(app, fmt):
+    img = shot(fmt=fmt)
+    expected = decoded(encode("qt-png", img))
+    assert expected.shape == (37, 53, 4) and (expected[..., 3] == 255).all()
+    for name in LOSSLESS:
+        assert np.array_equal(decoded(encode(name, img)), expected), name
+
+
+def test_paths_and_file_objects_get_the_same_pixels(app, tmp_path):
+    img = shot(1)
+    for name in LOSSLESS:
+        path = str(tmp_path / f"{name}.{sstaker.ENCODERS[name].ext}")
+        assert np.array_equal(decoded(encode(name, img, path)), decoded(encode(name, img))), name
+
+
+def test_palette_images_keep_their_colours(app):
+    img = sstaker.PostProcessor(colors=8).apply(shot(2))
+    assert img.format() == QtGui.QImage.Format_Indexed8
+    expected = decoded(encode("qt-png", img))
+    for name in LOSSLESS:
+        assert np.array_equal(decoded(encode(name, img)), expected), name
+
+
+def test_lossy_encoders_stay_close(app):
+    # Flat colours, which lossy codecs keep near enough
+    img = QtGui.QImage(64, 48, QtGui.QImage.Format_RGB32)
+    img.fill(QtGui.QColor(40, 120, 200))
+    expected = decoded(encode("qt-png", img)).astype(int)
+    for name in ("webp", "jpeg"):
+        assert np.abs(decoded(encode(name, img))[..., :3].astype(int) - expected[..., :3]).max() <= 4, name
+
+
+def test_encoding_keeps_the_image_pixels(app):
+    img = shot(3)
+    before = sstaker.qimage_to_array(img).copy()
+    for name in sstaker.ENCODERS:
+        # PilEncoder swizzles the image in place; the pixels must survive it
+        sstaker.ENCODERS[name].encode(img, io.BytesIO())
+        assert np.array_equal(sstaker.qimage_to_array(img.convertToFormat(QtGui.QImage.Format_RGB32)), before), name
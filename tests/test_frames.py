@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore, QtGui, QtWidgets
+import sstaker
+
+W, H = 64, 48
+
+
+@pytest.fixture
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def ring(app, request):
+    # A publisher under a name of its own and a consumer attached to it
+    name = f"{sstaker.FRAMES_NAME}-test{os.getpid()}-{request.node.name}"
+    publisher = sstaker.FramePublisher(W * H * 4, name)
+    consumer = sstaker.FrameConsumer(name)
+    deadline = time.monotonic() + 5
+    while not publisher.clients and time.monotonic() < deadline:
+        app.processEvents()
+    yield publisher, consumer
+    consumer.close()
+    publisher.close()
+
+
+def frame(colour, w=W, h=H):
+    img = QtGui.QImage(w, h, QtGui.QImage.Format_RGB32)
+    img.fill(QtGui.QColor(colour))
+    return img
+
+
+def test_frames_round_trip(ring):
+    publisher, consumer = ring
+    sent = [frame("red"), frame("teal")]
+    for i, img in enumerate(sent):
+        publisher.publish(img, QtCore.QRect(10 * i, 20, W, H), 1000.0 + i)
+    frames = consumer.frames(1000)
+    for i, img in enumerate(sent):
+        header, pixels = next(frames)
+        assert header["seq"] == i + 1
+        assert (header["width"], header["height"], header["format"]) == (W, H, "BGRX")
+        assert header["rect"] == (10 * i, 20, W, H) and header["timestamp"] == 1000.0 + i
+        assert bytes(pixels) == bytes(sstaker.qimage_to_array(img).tobytes())
+        assert consumer.valid(header)
+        pixels.release()
+
+
+def test_frames_larger_than_a_slot_are_skipped(ring):
+    publisher, consumer = ring
+    assert publisher.publish(frame("red", W * 2, H), QtCore.QRect(0, 0, W * 2, H)) is None
+    assert publisher.skipped == 1
+    assert publisher.publish(frame("red"), QtCore.QRect(0, 0, W, H)) == 1
+    header, pixels = next(consumer.frames(1000))
+    assert header["width"] == W
+    pixels.release()
+
+
+def test_slot_size_is_capped(app, monkeypatch):
+    monkeypatch.delenv("SSTAKER_FRAME_SLOT_MB", raising=False)
+    largest = max(int(s.geometry().width() * s.devicePixelRatio() + 1)
+                  * int(s.geometry().height() * s.devicePixelRatio() + 1) * 4 for s in app.screens())
+    monkeypatch.setattr(sstaker, "FRAMES_NAME", f"{sstaker.FRAMES_NAME}-test{os.getpid()}-cap")
+    publisher = sstaker.FramePublisher.for_desktop()
+    assert publisher.slot_bytes == largest
+    publisher.close()
+    monkeypatch.setenv("SSTAKER_FRAME_SLOT_MB", "0.5")
+    publisher = sstaker.FramePublisher.for_desktop()
+    assert publisher.slot_bytes == 512 * 1024
+    publisher.close()
+
+
+def test_slow_consumer_sees_overwritten_frames(ring):
+    publisher, consumer = ring
+    publisher.publish(frame("red"), QtCore.QRect(0, 0, W, H))
+    header, pixels = consumer.read(1 % publisher.SLOTS)
+    pixels.release()
+    assert consumer.valid(header)
+    # The consumer falls a full ring behind: frame 1's slot is reused
+    for i in range(publisher.SLOTS):
+        publisher.publish(frame("teal"), QtCore.QRect(0, 0, W, H))
+    assert not consumer.valid(header)
+    # Its notification is dropped rather than handing out the newer frame
+    seqs = []
+    for header, pixels in consumer.frames(200):
+        seqs.append(header["seq"])
+        pixels.release()
+    assert seqs == list(range(2, publisher.SLOTS + 2))
+
+
+def test_save_queue_hands_back_processed_image_for_publishing(app, tmp_path):
+    queue = sstaker.SaveQueue()
+    threads = []
+
+    def post(img):
+        threads.append(threading.get_ident())
+        return img.scaled(W // 2, H // 2)
+
+    processed = []
+    queue.processed.connect(lambda img, meta: processed.append((threading.get_ident(), img.size(), meta["rect"])))
+    meta = {"taken": time.time(), "rect": (1, 2, W, H)}
+    assert queue.submit(frame("red"), str(tmp_path / "a.png"), sstaker.ENCODERS["png"], meta, post, publish=True)
+    assert queue.submit(frame("red"), str(tmp_path / "b.png"), sstaker.ENCODERS["png"], dict(meta))
+    queue.drain()
+    app.processEvents()
+    assert threads and threads[0] != threading.get_ident()
+    assert processed == [(threading.get_ident(), QtCore.QSize(W // 2, H // 2), (1, 2, W, H))]
+    assert QtGui.QImage(str(tmp_path / "a.png")).size() == QtCore.QSize(W // 2, H // 2)
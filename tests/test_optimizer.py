@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import sstaker
+
+
+def capture(path, compress_level=0, seed=0):
+    # Opaque RGBA PNG, stored as loosely as the save queue's fast encoders do
+    arr = np.zeros((120, 160, 4), np.uint8)
+    arr[..., :3] = np.random.default_rng(seed).integers(0, 4, (120, 160, 3)) * 60
+    arr[..., 3] = 255
+    Image.fromarray(arr, "RGBA").save(path, compress_level=compress_level)
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    return arr
+
+
+def decoded(path):
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGBA"))
+
+
+def test_smaller_file_with_same_pixels_replaces_original(tmp_path):
+    path = str(tmp_path / "shot.png")
+    arr = capture(path)
+    st = os.stat(path)
+    _, old_size, new_size = sstaker.optimize_capture(path)
+    assert old_size == st.st_size and new_size < old_size
+    assert os.path.getsize(path) == new_size
+    assert np.array_equal(decoded(path), arr)
+    assert os.stat(path).st_mtime == st.st_mtime
+    assert os.listdir(tmp_path) == ["shot.png"]
+
+
+def test_output_is_never_larger(tmp_path):
+    # Files the re-encode can't beat: already optimized, and too small to gain
+    Image.fromarray(capture(str(tmp_path / "a.png"))[..., :3], "RGB").save(tmp_path / "a.png", optimize=True)
+    Image.new("RGB", (1, 1)).save(tmp_path / "b.png", optimize=True)
+    for name in ("a.png", "b.png"):
+        path = str(tmp_path / name)
+        with open(path, "rb") as f:
+            before = f.read()
+        _, old_size, new_size = sstaker.optimize_capture(path)
+        assert new_size == old_size == len(before)
+        with open(path, "rb") as f:
+            assert f.read() == before
+    assert sorted(os.listdir(tmp_path)) == ["a.png", "b.png"]
+
+
+def test_original_is_only_ever_swapped_whole(tmp_path, monkeypatch):
+    path = str(tmp_path / "shot.png")
+    capture(path)
+    with open(path, "rb") as f:
+        before = f.read()
+    replaced = []
+
+    def replace(src, dst):
+        # The new file is complete before it takes the original's place
+        assert decoded(src).shape == (120, 160, 4)
+        with open(dst, "rb") as f:
+            assert f.read() == before
+        replaced.append((src, dst))
+        raise OSError("disk pulled")
+
+    monkeypatch.setattr(sstaker.os, "replace", replace)
+    with pytest.raises(OSError):
+        sstaker.optimize_capture(path)
+    assert replaced == [(path + ".opt", path)]
+    with open(path, "rb") as f:
+        assert f.read() == before
+    assert os.listdir(tmp_path) == ["shot.png"]
+
+
+def test_file_changed_meanwhile_is_left_alone(tmp_path, monkeypatch):
+    path = str(tmp_path / "shot.png")
+    capture(path)
+    real_open = Image.open
+    opened = []
+
+    def open_then_touch(fp, *args, **kwargs):
+        # The user edits the capture while it is being re-encoded
+        opened.append(fp)
+        if len(opened) == 2:
+            os.utime(path, None)
+        return real_open(fp, *args, **kwargs)
+
+    monkeypatch.setattr(Image, "open", open_then_touch)
+    _, old_size, new_size = sstaker.optimize_capture(path)
+    assert new_size == old_size == os.path.getsize(path)
+    assert os.listdir(tmp_path) == ["shot.png"]
+
+
+def test_idle_asks_the_desktop_first(monkeypatch):
+    busy = [False]
+    optimizer = sstaker.CaptureOptimizer(None, lambda: busy[0])
+    optimizer.last_busy = time.monotonic() - 2 * optimizer.IDLE_SECONDS
+    monkeypatch.setattr(sstaker, "user_idle_seconds", lambda: 5.0)
+    assert not optimizer.idle()  # Typing, though nothing was captured lately
+    monkeypatch.setattr(sstaker, "user_idle_seconds", lambda: None)
+    assert optimizer.idle()  # No input source: time since the last capture
+    busy[0] = True
+    assert not optimizer.idle()
+    busy[0] = False
+    assert not optimizer.idle()
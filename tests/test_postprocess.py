@@ -0,0 +1,89 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtGui
+import sstaker
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+
+def image(arr):
+    # RGB32 QImage from an (h, w, 3) RGB array
+    h, w = arr.shape[:2]
+    img = QtGui.QImage(w, h, QtGui.QImage.Format_RGB32)
+    sstaker.qimage_to_array(img, writable=True)[:] = np.dstack([arr[..., ::-1], np.full((h, w), 255, np.uint8)])
+    return img
+
+
+def rgb(img):
+    img = img.convertToFormat(QtGui.QImage.Format_RGB32)
+    return sstaker.qimage_to_array(img)[..., 2::-1].copy()
+
+
+def noise(h, w, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (h, w, 3), dtype=np.uint8)
+
+
+def test_inactive_returns_image_itself(app):
+    img = image(noise(20, 30))
+    assert sstaker.PostProcessor().apply(img) is img
+
+
+def test_fill_redacts_only_the_region(app):
+    src = noise(40, 60)
+    out = rgb(sstaker.PostProcessor("fill").apply(image(src), [(10, 5, 20, 10)]))
+    assert (out[5:15, 10:30] == 0).all()
+    out[5:15, 10:30] = src[5:15, 10:30]
+    assert (out == src).all()
+
+
+def test_pixelate_averages_blocks(app):
+    src = noise(24, 24)
+    out = rgb(sstaker.PostProcessor("pixelate", block=12).apply(image(src), [(0, 0, 24, 24)]))
+    for y in (0, 12):
+        for x in (0, 12):
+            block = out[y:y + 12, x:x + 12].reshape(-1, 3)
+            assert (block == block[0]).all()
+            assert np.abs(block[0].astype(int) - src[y:y + 12, x:x + 12].reshape(-1, 3).mean(0)).max() <= 1
+
+
+def test_downscale_keeps_aspect_and_averages(app):
+    src = np.zeros((300, 400, 3), np.uint8)
+    src[:, ::2] = 200  # Alternating columns average to 100
+    out = sstaker.PostProcessor(max_dim=200).apply(image(src))
+    assert (out.width(), out.height()) == (200, 150)
+    assert np.abs(rgb(out)[10:-10, 10:-10].astype(int) - 100).max() <= 2
+
+
+def test_few_colours_are_kept_exactly(app):
+    src = np.zeros((30, 40, 3), np.uint8)
+    src[:10] = (255, 0, 0)
+    src[10:20] = (12, 34, 56)
+    out = sstaker.PostProcessor(colors=16).apply(image(src))
+    assert out.format() == QtGui.QImage.Format_Indexed8
+    assert len(out.colorTable()) == 3  # Black for the rest
+    assert (rgb(out) == src).all()
+
+
+def test_palette_keeps_popular_colours_and_maps_the_rest_near(app):
+    src = noise(64, 64)
+    src[:32] = (40, 80, 120)  # The most popular colour by far
+    out = sstaker.PostProcessor(colors=64).apply(image(src))
+    assert len(out.colorTable()) == 64
+    result = rgb(out)
+    assert (result[:32] == (40, 80, 120)).all()
+    # Every pixel is within a 5-bit cell's reach of its nearest palette colour
+    palette = rgb(out.convertToFormat(QtGui.QImage.Format_RGB32)).reshape(-1, 3)
+    palette = np.unique(palette, axis=0).astype(int)
+    rest = src[32:].reshape(-1, 3).astype(int)
+    nearest = ((rest[:, None] - palette[None]) ** 2).sum(-1).min(1)
+    got = ((rest - result[32:].reshape(-1, 3).astype(int)) ** 2).sum(-1)
+    assert (np.sqrt(got) <= np.sqrt(nearest) + 2 * 4 * np.sqrt(3)).all()
@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtGui, QtWidgets
+import sstaker
+
+
+@pytest.fixture
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class RecordingEncoder:
+    # The default PNG encoder, noting the thread each save ran on
+    ext = "png"
+
+    def __init__(self, gate=None):
+        self.threads = []
+        self.gate = gate
+
+    def encode(self, img, file_path):
+        self.threads.append(threading.get_ident())
+        if self.gate is not None:
+            assert self.gate.wait(5)
+        sstaker.ENCODERS["png"].encode(img, file_path)
+
+
+def shot(colour, w=40, h=30):
+    img = QtGui.QImage(w, h, QtGui.QImage.Format_RGB32)
+    img.fill(QtGui.QColor(colour))
+    return img
+
+
+def settle(app, queue):
+    assert queue.drain(10000)
+    app.processEvents()
+
+
+def test_saves_run_off_the_gui_thread(app, tmp_path):
+    queue = sstaker.SaveQueue()
+    gate = threading.Event()
+    encoder = RecordingEncoder(gate)
+    saved = []
+    queue.saved.connect(lambda path, ms: saved.append((threading.get_ident(), path)))
+    path = str(tmp_path / "a.png")
+    assert queue.submit(shot("red"), path, encoder)
+    # submit returns while the encode is still held up on its worker
+    assert queue.depth() == 1 and not saved
+    gate.set()
+    settle(app, queue)
+    assert encoder.threads and encoder.threads[0] != threading.get_ident()
+    assert saved == [(threading.get_ident(), path)]
+    assert queue.depth() == 0
+
+
+def test_each_file_gets_its_own_image(app, tmp_path):
+    queue = sstaker.SaveQueue(max_pending=16, workers=4)
+    colours = ["red", "green", "blue", "teal", "olive", "navy", "maroon", "purple"]
+    paths = [str(tmp_path / f"{colour}.png") for colour in colours]
+    saved = []
+    queue.saved.connect(lambda path, ms: saved.append(path))
+    for i, (colour, path) in enumerate(zip(colours, paths)):
+        assert queue.submit(shot(colour, 40 + i), path, sstaker.ENCODERS["png"])
+    settle(app, queue)
+    assert sorted(saved) == sorted(paths)
+    for i, (colour, path) in enumerate(zip(colours, paths)):
+        img = QtGui.QImage(path)
+        assert img.width() == 40 + i
+        assert img.pixelColor(5, 5) == QtGui.QColor(colour)
+
+
+def test_single_worker_saves_in_submission_order(app, tmp_path):
+    queue = sstaker.SaveQueue(max_pending=16, workers=1)
+    saved = []
+    queue.saved.connect(lambda path, ms: saved.append(path))
+    paths = [str(tmp_path / f"{i}.png") for i in range(6)]
+    for path in paths:
+        assert queue.submit(shot("red"), path, sstaker.ENCODERS["png"])
+    settle(app, queue)
+    assert saved == paths
+    assert [path for path, _ in queue.timings] == paths
+
+
+def test_full_queue_refuses_more(app, tmp_path):
+    queue = sstaker.SaveQueue(max_pending=2, workers=1)
+    gate = threading.Event()
+    encoder = RecordingEncoder(gate)
+    depths = []
+    queue.depth_changed.connect(depths.append)
+    assert queue.submit(shot("red"), str(tmp_path / "a.png"), encoder)
+    assert queue.submit(shot("red"), str(tmp_path / "b.png"), encoder)
+    assert not queue.submit(shot("red"), str(tmp_path / "c.png"), encoder)
+    gate.set()
+    settle(app, queue)
+    assert sorted(os.listdir(tmp_path)) == ["a.png", "b.png"]
+    assert depths == [1, 2, 1, 0]
+
+
+def test_failures_are_reported_and_placeholders_released(app, tmp_path):
+    queue = sstaker.SaveQueue()
+    failed = []
+    queue.failed.connect(lambda path, error: failed.append((path, error)))
+    path = sstaker.unique_path(str(tmp_path), "shot", "png")
+    assert queue.submit(shot("red"), path, sstaker.ENCODERS["png"], post=lambda img: 1 / 0)
+    settle(app, queue)
+    assert [p for p, _ in failed] == [path] and "ZeroDivisionError" in failed[0][1]
+    queue.release(path)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore, QtGui, QtWidgets
+import sstaker
+
+BLACK = QtGui.QColor("black").rgb()
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def tile(x, y, w, h, dpr, colour):
+    # A screen as Qt 5 reports it: origin in device pixels, size in logical
+    # ones, grabbed at native resolution
+    pixmap = QtGui.QPixmap(int(w * dpr), int(h * dpr))
+    pixmap.fill(QtGui.QColor(colour))
+    return QtCore.QRect(x, y, w, h), pixmap
+
+
+def mixed():
+    # 1920x1080 @2, 1920x1080 @1 and 2048x1152 @1.25 side by side
+    return sstaker.ScreenGrab([tile(0, 0, 1920, 1080, 2.0, "red"), tile(3840, 0, 1920, 1080, 1.0, "green"),
+                               tile(5760, 0, 2048, 1152, 1.25, "blue")], QtCore.QPoint(0, 0))
+
+
+def colours(img, y):
+    return {QtGui.QColor(img.pixel(x, y)).name() for x in range(img.width())}
+
+
+def test_copy_within_one_screen_is_native(app):
+    img = mixed().copy_image(QtCore.QRect(100, 100, 50, 20))
+    assert img.size() == QtCore.QSize(100, 40)
+
+
+def test_copy_across_mixed_dpi_screens_has_no_gap(app):
+    # Logical x 1920-3839 is on no screen: the @2 screen ends at 1920 but
+    # the next one starts at its device-pixel origin, 3840
+    img = mixed().copy_image(QtCore.QRect(QtCore.QPoint(1900, 100), QtCore.QPoint(3860, 200)))
+    assert img.size() == QtCore.QSize((20 + 21) * 2, 101 * 2)
+    assert QtGui.QColor(img.pixel(39, 50)).name() == "#ff0000"
+    assert QtGui.QColor(img.pixel(40, 50)).name() == "#008000"
+    for y in (0, img.height() // 2, img.height() - 1):
+        assert colours(img, y) == {"#ff0000", "#008000"}
+
+
+def test_copy_across_three_screens(app):
+    grab = mixed()
+    img = grab.copy_image(QtCore.QRect(QtCore.QPoint(1800, 0), QtCore.QPoint(5859, 99)))
+    # 120 + 1920 + 100 logical columns, scaled up to the @2 screen
+    assert img.size() == QtCore.QSize((120 + 1920 + 100) * 2, 200)
+    assert colours(img, 100) == {"#ff0000", "#008000", "#0000ff"}
+    assert BLACK not in {img.pixel(x, 100) for x in range(img.width())}
+
+
+def test_rows_no_screen_covers_are_closed(app):
+    grab = sstaker.ScreenGrab([tile(0, 0, 960, 540, 2.0, "red"), tile(0, 1080, 1920, 1080, 1.0, "green")],
+                              QtCore.QPoint(0, 0))
+    img = grab.copy_image(QtCore.QRect(0, 500, 100, 600))
+    assert img.size() == QtCore.QSize(200, (40 + 20) * 2)
+    assert QtGui.QColor(img.pixel(10, 79)).name() == "#ff0000"
+    assert QtGui.QColor(img.pixel(10, 80)).name() == "#008000"
@@ -0,0 +1,139 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import sstaker
+
+FRAME_H = 160
+WIDTH = 200
+
+
+def make_page(height, seed=0):
+    # Screenshot-like page: flat background with rows of "text" runs and
+    # blank gaps between lines, so some rows carry no information
+    rng = np.random.default_rng(seed)
+    page = np.full((height, WIDTH, 4), 255, np.uint8)
+    for top in range(0, height - 12, 18):
+        line = rng.integers(0, 2, (12, WIDTH)).astype(bool)
+        line &= rng.random(WIDTH) < 0.7
+        page[top:top + 12][line] = (40, 40, 40, 255)
+    return page
+
+
+def frame(page, top):
+    return np.ascontiguousarray(page[top:top + FRAME_H])
+
+
+@pytest.mark.parametrize("offset", [0, 1, 7, 40, 100, FRAME_H - 16])
+def test_find_scroll_offset_known(offset):
+    page = make_page(1000)
+    prev = sstaker.row_hashes(frame(page, 300))
+    cur = sstaker.row_hashes(frame(page, 300 + offset))
+    assert sstaker.find_scroll_offset(prev, cur) == offset
+
+
+def test_find_scroll_offset_unrelated_frames():
+    prev = sstaker.row_hashes(frame(make_page(400, seed=1), 0))
+    cur = sstaker.row_hashes(frame(make_page(400, seed=2), 0))
+    assert sstaker.find_scroll_offset(prev, cur) is None
+
+
+def stitched(stitcher):
+    stitcher.file.flush()
+    stitcher.file.seek(0)
+    data = np.frombuffer(stitcher.file.read(), np.uint8)
+    return data.reshape(stitcher.height, stitcher.width, 4)
+
+
+def test_stitch_matches_page():
+    page = make_page(2000)
+    stitcher = sstaker.ScrollStitcher()
+    tops = [0, 30, 30, 95, 96, 180, 300, 420, 500]
+    for top in tops:
+        stitcher.add(frame(page, top))
+    bottom = tops[-1] + FRAME_H
+    assert stitcher.width == WIDTH
+    assert stitcher.height == bottom
+    assert stitcher.gaps == []
+    assert np.array_equal(stitched(stitcher), page[:bottom])
+
+
+def test_stitch_recovers_after_jump():
+    page = make_page(3000)
+    stitcher = sstaker.ScrollStitcher()
+    tops = [0, 60, 120] + [1000 + 50 * i for i in range(20)]
+    for top in tops:
+        stitcher.add(frame(page, top))
+    # Everything after the jump is still stitched, and the jump is reported
+    assert stitcher.gaps == [120 + FRAME_H]
+    assert stitcher.height == (120 + FRAME_H) + (tops[-1] + FRAME_H - 1000)
+    out = stitched(stitcher)
+    assert np.array_equal(out[120 + FRAME_H:], page[1000:tops[-1] + FRAME_H])
+
+
+def test_stitch_stops_at_max_height():
+    page = make_page(2000)
+    stitcher = sstaker.ScrollStitcher(max_height=400)
+    for top in range(0, 1000, 80):
+        stitcher.add(frame(page, top))
+    assert stitcher.height == 400
+    assert np.array_equal(stitched(stitcher), page[:400])
+
+
+def test_scroll_capture_encodes_off_the_gui_thread(tmp_path):
+    from PyQt5 import QtCore, QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    path = str(tmp_path / "scroll.png")
+    capture = sstaker.ScrollCapture(QtCore.QRect(0, 0, WIDTH, FRAME_H), path, sstaker.ENCODERS["qt-png"])
+    page = make_page(1000)
+    for top in range(0, 600, 50):
+        capture.stitcher.add(frame(page, top))
+    done = []
+    capture.finished.connect(lambda *args: done.append((threading.current_thread(), args)))
+    capture.failed.connect(lambda error: done.append(error))
+    capture.stop()
+    assert capture.wait(10000)
+    assert done == []  # Queued back to the GUI thread, not called from the worker
+    app.processEvents()
+    assert done == [(threading.main_thread(), (path, 550 + FRAME_H, capture.stitcher.rows_per_second()))]
+    assert sstaker.QtGui.QImage(path).height() == 550 + FRAME_H
+
+
+@pytest.mark.parametrize("encoder", ["png", "png-small", "qt-png"])
+def test_png_is_written_in_strips_from_the_stitched_rows(tmp_path, encoder):
+    from PIL import Image
+    page = make_page(1200)
+    page[:, :, :3] = np.random.default_rng(3).integers(0, 256, (1200, WIDTH, 3), dtype=np.uint8)
+    stitcher = sstaker.ScrollStitcher()
+    stitcher.STRIP_ROWS = 100  # Several strips, the last one short
+    for top in range(0, 1000, 70):
+        stitcher.add(frame(page, top))
+    rows = stitched(stitcher).copy()
+    path = str(tmp_path / "scroll.png")
+    preview = stitcher.finish(path, sstaker.ENCODERS[encoder], preview_size=64)
+    with Image.open(path) as img:
+        assert np.array_equal(np.asarray(img.convert("RGB")), rows[:, :, 2::-1])
+    assert max(preview.size) <= 64
+    assert np.array_equal(np.asarray(preview)[0, 0], rows[0, 0, [2, 1, 0, 3]])
+
+
+def test_scroll_capture_is_catalogued(tmp_path):
+    from PyQt5 import QtCore, QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    path = str(tmp_path / "scroll.png")
+    capture = sstaker.ScrollCapture(QtCore.QRect(5, 6, WIDTH, FRAME_H), path, sstaker.ENCODERS["png"])
+    capture.catalog = sstaker.CaptureCatalog(str(tmp_path / "catalog"))
+    page = make_page(1000)
+    for top in range(0, 300, 50):
+        capture.stitcher.add(frame(page, top))
+    capture.stop()
+    assert capture.wait(10000)
+    app.processEvents()
+    rows = list(capture.catalog.db.execute("SELECT path, width, height, x, y, w, h FROM captures"))
+    assert rows == [(path, WIDTH, 250 + FRAME_H, 5, 6, WIDTH, FRAME_H)]
+    assert len(os.listdir(capture.catalog.thumb_dir)) == 1
@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+SSTAKER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sstaker.py")
+# Time to tray-ready on the offscreen platform; override for slow machines
+BUDGET_MS = os.environ.get("SSTAKER_STARTUP_BUDGET_MS", "1500")
+
+
+def test_tray_ready_within_budget(tmp_path):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", HOME=str(tmp_path), USERPROFILE=str(tmp_path))
+    result = subprocess.run([sys.executable, SSTAKER, "--startup-budget", BUDGET_MS],
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert "tray ready in" in result.stderr
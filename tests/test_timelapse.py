@@ -0,0 +1,151 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore, QtGui, QtWidgets
+import sstaker
+
+T = sstaker.TimelapseStore.TILE
+
+
+def screen(seed=0, h=3 * T, w=4 * T + 10):
+    # BGRA frame whose width isn't a whole number of tiles
+    arr = np.random.default_rng(seed).integers(0, 256, (h, w, 4), dtype=np.uint8)
+    arr[..., 3] = 255
+    return arr
+
+
+def pixels(image):
+    # BGRA array of a rebuilt RGBA PIL image
+    return np.asarray(image)[..., [2, 1, 0, 3]]
+
+
+def test_unchanged_frame_stores_no_tiles(tmp_path):
+    store = sstaker.TimelapseStore(str(tmp_path))
+    frame = screen()
+    store.add_frame(frame, 1.0)
+    size = os.path.getsize(store.tiles_path)
+    store.add_frame(frame.copy(), 2.0)
+    assert os.path.getsize(store.tiles_path) == size
+    assert store.frames[1]["tiles"] == [] and not store.frames[1]["key"]
+
+
+def test_only_changed_tiles_are_recorded(tmp_path):
+    store = sstaker.TimelapseStore(str(tmp_path))
+    frame = screen()
+    store.add_frame(frame, 1.0)
+    frame = frame.copy()
+    frame[T + 5, 2 * T + 7] = (1, 2, 3, 255)  # Row 1, column 2
+    store.add_frame(frame, 2.0)
+    assert [idx for idx, _, _ in store.frames[1]["tiles"]] == [1 * 5 + 2]
+
+
+def test_identical_tiles_are_stored_once(tmp_path):
+    store = sstaker.TimelapseStore(str(tmp_path))
+    frame = np.zeros((2 * T, 3 * T, 4), np.uint8)
+    frame[..., 3] = 255
+    frame[:T, :T] = screen(1)[:T, :T]
+    frame[T:, 2 * T:] = frame[:T, :T]
+    store.add_frame(frame, 1.0)
+    tiles = store.frames[0]["tiles"]
+    assert len(tiles) == 6
+    # Four blank tiles and two copies of the same one: two stored contents
+    assert len({(offset, length) for _, offset, length in tiles}) == 2
+
+
+def test_hash_notices_a_single_bit_in_any_tile(tmp_path):
+    store = sstaker.TimelapseStore(str(tmp_path))
+    frame = screen()
+    store.add_frame(frame, 1.0)
+    frame = frame.copy()
+    h, w = frame.shape[:2]
+    for y in range(0, h, T):
+        for x in range(0, w, T):
+            frame[min(y + 9, h - 1), min(x + 3, w - 1), 1] ^= 1
+    store.add_frame(frame, 2.0)
+    assert len(store.frames[1]["tiles"]) == len(store.frames[0]["tiles"]) == 3 * 5
+
+
+def test_keyframes_bound_replay(tmp_path, monkeypatch):
+    monkeypatch.setattr(sstaker.TimelapseStore, "KEYFRAME_INTERVAL", 3)
+    store = sstaker.TimelapseStore(str(tmp_path))
+    frames = []
+    for i in range(7):
+        frame = screen() if not frames else frames[-1].copy()
+        frame[(i * 7) % frame.shape[0], (i * 13) % frame.shape[1]] = (i, i, i, 255)
+        store.add_frame(frame, float(i))
+        frames.append(frame)
+    assert [record["key"] for record in store.frames] == [True, False, False, True, False, False, True]
+    # Reopened from disk, every frame rebuilds exactly
+    store = sstaker.TimelapseStore(str(tmp_path))
+    for i, frame in enumerate(frames):
+        assert np.array_equal(pixels(store.rebuild(i)), frame)
+    with pytest.raises(IndexError):
+        store.rebuild(len(frames))
+
+
+def test_timelapse_export(tmp_path, capsys):
+    store = sstaker.TimelapseStore(str(tmp_path / "tl"))
+    frames = [screen(seed) for seed in range(4)]
+    for i, frame in enumerate(frames):
+        store.add_frame(frame, float(i))
+    out = tmp_path / "out"
+    assert sstaker.timelapse_export_main([str(tmp_path / "tl"), "--start", "1", "--stop", "3", "--out", str(out)]) == 0
+    assert sorted(os.listdir(out)) == ["frame_000001.png", "frame_000002.png"]
+    assert capsys.readouterr().out.split() == [str(out / "frame_000001.png"), str(out / "frame_000002.png")]
+    with Image.open(out / "frame_000002.png") as img:
+        assert np.array_equal(pixels(img.convert("RGBA")), frames[2])
+    with pytest.raises(SystemExit):
+        sstaker.timelapse_export_main([str(tmp_path / "tl"), "--start", "4"])
+    with pytest.raises(SystemExit):
+        sstaker.timelapse_export_main([str(tmp_path / "missing")])
+
+
+class CountingBackend:
+    name = "test"
+
+    def __init__(self):
+        self.grabbed = []
+
+    def grab(self, screen, rect=None):
+        size = screen.geometry().size() if rect is None else rect.size()
+        self.grabbed.append(size)
+        pixmap = QtGui.QPixmap(size)
+        pixmap.fill(QtGui.QColor("teal"))
+        return pixmap
+
+
+class CountingWindows:
+    def __init__(self):
+        self.calls = 0
+
+    def windows(self):
+        self.calls += 1
+        return []
+
+
+def test_recorder_grabs_only_the_region(tmp_path, monkeypatch):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    backend = CountingBackend()
+    monkeypatch.setattr(sstaker, "_capture_backend", backend)
+    windows = CountingWindows()
+    monkeypatch.setattr(sstaker, "_window_source", windows)
+    recorder = sstaker.TimelapseRecorder(str(tmp_path), 60, QtCore.QRect(10, 20, 100, 70))
+    recorder.capture()
+    recorder.stop()
+    assert backend.grabbed == [QtCore.QSize(100, 70)]
+    assert store_size(recorder.store) == [100, 70]
+    recorder = sstaker.TimelapseRecorder(str(tmp_path / "whole"), 60)
+    recorder.capture()
+    recorder.stop()
+    assert store_size(recorder.store) == [sstaker.desktop_rect().width(), sstaker.desktop_rect().height()]
+    assert windows.calls == 0
+
+
+def store_size(store):
+    return store.frames[-1]["size"]
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtCore, QtGui, QtWidgets
+import sstaker
+
+FILL = QtGui.QColor(200, 100, 50)
+
+
+class FillBackend:
+    name = "test"
+
+    def grab(self, screen, rect=None):
+        size = screen.geometry().size() if rect is None else rect.size()
+        pixmap = QtGui.QPixmap(size)
+        pixmap.fill(FILL)
+        return pixmap
+
+
+@pytest.fixture
+def app():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    saved = sstaker._capture_backend, sstaker._window_source
+    sstaker._capture_backend = FillBackend()
+    yield app
+    sstaker._capture_backend, sstaker._window_source = saved
+
+
+def overlay_with(windows):
+    sstaker._window_source = sstaker.StaticWindowSource(windows)
+    overlay = sstaker.Overlay()
+    overlay.show_screenshot(*sstaker.Overlay.grab_fullscreen())
+    return overlay
+
+
+def render(overlay):
+    size = overlay.screenshot.rect.size()
+    img = QtGui.QImage(size, QtGui.QImage.Format_ARGB32)
+    img.fill(0)
+    painter = QtGui.QPainter(img)
+    overlay.paint(painter, QtCore.QRect(QtCore.QPoint(0, 0), size))
+    painter.end()
+    return img
+
+
+def click(overlay, pos):
+    overlay.move(pos, QtCore.Qt.NoModifier)
+    overlay.press(pos)
+    overlay.release(pos)
+
+
+def test_window_index_topmost_and_children():
+    index = sstaker.WindowIndex([
+        (QtCore.QRect(100, 100, 300, 200), 0),
+        (QtCore.QRect(120, 150, 50, 40), 1),
+        (QtCore.QRect(0, 0, 1200, 900), 0),
+    ])
+    assert index.hit(QtCore.QPoint(130, 160)) == QtCore.QRect(100, 100, 300, 200)
+    assert index.hit(QtCore.QPoint(130, 160), children=True) == QtCore.QRect(120, 150, 50, 40)
+    # Below the top window, and across a grid cell boundary
+    assert index.hit(QtCore.QPoint(600, 600)) == QtCore.QRect(0, 0, 1200, 900)
+    assert index.hit(QtCore.QPoint(1300, 10)) is None
+
+
+def test_window_index_translates_and_clips():
+    index = sstaker.WindowIndex([(QtCore.QRect(-50, -50, 200, 200), 0)],
+                                origin=QtCore.QPoint(-100, -100), bounds=QtCore.QRect(0, 0, 120, 120))
+    assert index.entries == [(QtCore.QRect(50, 50, 70, 70), 0)]
+
+
+@pytest.mark.parametrize("top_left", [(0, 0), (10, 10)])
+def test_click_selects_window(app, top_left):
+    window = QtCore.QRect(QtCore.QPoint(*top_left), QtCore.QSize(400, 300))
+    overlay = overlay_with([(window, 0)])
+    click(overlay, window.center())
+    assert overlay.selection_rect == window
+    assert overlay.selection_bounds().contains(window)
+    img = render(overlay)
+    assert img.pixel(window.center()) == FILL.rgba()
+    # The border is drawn at the window's top-left corner
+    assert img.pixelColor(window.topLeft()) == QtGui.QColor(QtCore.Qt.red)
+    overlay.close()
+
+
+def test_drag_from_origin_selects(app):
+    overlay = overlay_with([])
+    overlay.press(QtCore.QPoint(0, 0))
+    overlay.move(QtCore.QPoint(200, 150), QtCore.Qt.NoModifier)
+    overlay.release(QtCore.QPoint(200, 150))
+    assert overlay.selection_rect == QtCore.QRect(QtCore.QPoint(0, 0), QtCore.QPoint(200, 150))
+    assert render(overlay).pixel(100, 75) == FILL.rgba()
+    overlay.close()
+
+
+def test_redaction_from_origin(app):
+    overlay = overlay_with([])
+    overlay.press_redaction(QtCore.QPoint(0, 0))
+    overlay.move(QtCore.QPoint(50, 40), QtCore.Qt.NoModifier)
+    overlay.release_redaction(QtCore.QPoint(50, 40))
+    assert overlay.redactions == [QtCore.QRect(QtCore.QPoint(0, 0), QtCore.QPoint(50, 40))]
+    overlay.close()